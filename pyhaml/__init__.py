@@ -1 +1 @@
-__all__ = ['haml', 'parser', 'lexer', 'patch']
+__all__ = ['haml', 'parser', 'lexer', 'patch', 'cache', 'runtime']
@@ -0,0 +1,157 @@
+import os
+import time
+import marshal
+import threading
+
+def digest(s):
+	import hashlib
+	if not isinstance(s, bytes):
+		s = s.encode('utf-8')
+	return hashlib.sha1(s).hexdigest()
+
+def magic():
+	try:
+		from importlib.util import MAGIC_NUMBER
+		return MAGIC_NUMBER
+	except ImportError:
+		import imp
+		return imp.get_magic()
+
+class LRU(object):
+
+	def __init__(self, maxsize=128):
+		from collections import OrderedDict
+		self.maxsize = maxsize
+		self.data = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __len__(self):
+		return len(self.data)
+
+	def __contains__(self, key):
+		return key in self.data
+
+	def get(self, key, default=None):
+		try:
+			value = self.data.pop(key)
+		except KeyError:
+			self.misses += 1
+			return default
+		self.data[key] = value
+		self.hits += 1
+		return value
+
+	def set(self, key, value):
+		self.data.pop(key, None)
+		self.data[key] = value
+		while len(self.data) > self.maxsize:
+			self.data.popitem(last=False)
+			self.evictions += 1
+
+	def clear(self):
+		self.data.clear()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def info(self):
+		return {
+			'hits': self.hits,
+			'misses': self.misses,
+			'evictions': self.evictions,
+			'size': len(self.data),
+			'maxsize': self.maxsize,
+		}
+
+class TTLCache(LRU):
+	
+	def __init__(self, maxsize=128, ttl=None):
+		LRU.__init__(self, maxsize)
+		self.ttl = ttl
+		self.lock = threading.Lock()
+	
+	def get(self, key, default=None):
+		self.lock.acquire()
+		try:
+			entry = LRU.get(self, key)
+			if entry is None:
+				return default
+			expires, value = entry
+			if expires is not None and expires < time.time():
+				del self.data[key]
+				return default
+			return value
+		finally:
+			self.lock.release()
+	
+	def set(self, key, value, ttl=None):
+		ttl = self.ttl if ttl is None else ttl
+		expires = None if ttl is None else time.time() + ttl
+		self.lock.acquire()
+		try:
+			LRU.set(self, key, (expires, value))
+		finally:
+			self.lock.release()
+
+class FileCache(object):
+	
+	def __init__(self, dir, ttl=None):
+		self.dir = dir
+		self.ttl = ttl
+	
+	def path(self, key):
+		return os.path.join(self.dir, '%s.frag' % digest(repr(key)))
+	
+	def get(self, key, default=None):
+		entry = load(self.path(key), repr(key))
+		if entry is None:
+			return default
+		expires, value = entry
+		if expires is not None and expires < time.time():
+			return default
+		return value
+	
+	def set(self, key, value, ttl=None):
+		ttl = self.ttl if ttl is None else ttl
+		expires = None if ttl is None else time.time() + ttl
+		dump(self.path(key), repr(key), (expires, value))
+	
+	def clear(self):
+		for f in os.listdir(self.dir):
+			if f.endswith('.frag'):
+				os.remove(os.path.join(self.dir, f))
+
+def load(path, stamp):
+	try:
+		f = open(path, 'rb')
+	except (IOError, OSError):
+		return None
+	try:
+		data = f.read()
+	finally:
+		f.close()
+	try:
+		head, code = marshal.loads(data)
+	except (EOFError, ValueError, TypeError):
+		return None
+	if head != stamp:
+		return None
+	return code
+
+def dump(path, stamp, code):
+	tmp = '%s.%d' % (path, os.getpid())
+	try:
+		dir = os.path.dirname(path)
+		if not os.path.isdir(dir):
+			os.makedirs(dir)
+		f = open(tmp, 'wb')
+		try:
+			f.write(marshal.dumps((stamp, code)))
+		finally:
+			f.close()
+		os.rename(tmp, path)
+	except (IOError, OSError):
+		if os.path.exists(tmp):
+			os.remove(tmp)
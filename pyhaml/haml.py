@@ -1,37 +1,204 @@
 from __future__ import division
 
-import re
 import os
-import imp
-import cgi
 import sys
-from optparse import OptionParser
+import copy
+import time
+import types
+import threading
 
 if __name__ == '__main__' and __package__ == None:
 	__package__ = 'pyhaml'
 
-from . import lexer,parser
-from .ply import lex, yacc
-from .patch import ex
+from .patch import ex, builtins
+from .cache import LRU, digest
+from . import cache
+from . import runtime
+from .runtime import Markup
 
 __version__ = '0.1'
 	
-class haml_loader(object):
+class chunk_buffer(list):
 	
-	def __init__(self, engine, path):
+	def __init__(self, size):
+		list.__init__(self)
+		self.size = size
+		self.length = 0
+	
+	def append(self, s):
+		list.append(self, s)
+		self.length += len(s)
+	
+	def flush(self):
+		s = ''.join(self)
+		del self[:]
+		self.length = 0
+		return s
+
+class template_index(object):
+	
+	def __init__(self, interval=1.0):
+		self.interval = interval
+		self.entries = {}
+		self.checked = {}
+	
+	def scan(self, dir):
+		try:
+			mtime = os.stat(dir or os.curdir).st_mtime
+		except OSError:
+			return {}
+		entry = self.entries.get(dir)
+		if entry is None or entry[0] != mtime:
+			names = {}
+			for f in os.listdir(dir or os.curdir):
+				name, ext = os.path.splitext(f)
+				if ext == '.haml':
+					names[name] = os.path.join(dir, f)
+			entry = self.entries[dir] = (mtime, names)
+		return entry[1]
+	
+	def names(self, dir):
+		now = time.time()
+		if dir in self.entries and now - self.checked[dir] < self.interval:
+			return self.entries[dir][1]
+		self.checked[dir] = now
+		return self.scan(dir)
+	
+	def find(self, fullname, dirs):
+		for dir in dirs:
+			path = self.names(dir).get(fullname)
+			if path:
+				return path
+		return None
+	
+	def refresh(self):
+		self.entries.clear()
+		self.checked.clear()
+
+class render_context(object):
+	
+	def __init__(self, engine, op, context=None, html=None):
 		self.engine = engine
-		self.path = path
+		self.op = op
+		self.depth = 0
+		self.html = [] if html is None else html
+		self.modules = {}
+		self.marks = []
+		self.globals = {
+			'__builtins__': engine.builtins,
+			'__context__': self,
+			'__write__': self.write,
+			'__escape__': self.escape,
+			'__attrs__': self.attrs,
+			'__indent__': self.indent,
+			'__entab__': self.entab,
+			'__detab__': self.detab,
+			'__imp__': self.imp,
+			'__fragment__': self.fragment,
+			'__endfragment__': self.endfragment,
+			'__depth__': self.setdepth,
+			'__star__': self.star,
+		}
+		if context:
+			self.globals.update(context)
+	
+	def args(self):
+		return [self.globals[k] for k in engine.helpers] + [self.html, self.globals]
+	
+	def find_module(self, fullname):
+		return self.engine.find(self.op, fullname)
+	
+	def load_module(self, fullname, path):
+		mod = types.ModuleType(fullname)
+		mod.__file__ = path
+		code = self.engine.get_partial(path, self.op)
+		mod.__dict__.update(self.globals)
+		ex(code, mod.__dict__)
+		self.modules[fullname] = mod
+		return mod
+	
+	def import_(self, name, globals=None, locals=None, fromlist=(), level=0):
+		if level == 0 and '.' not in name:
+			mod = self.imp(name)
+			if mod is not None:
+				return mod
+		return builtins.__import__(name, globals, locals, fromlist, level)
+	
+	def star(self, name):
+		mod = self.import_(name, self.globals, None, ('*',))
+		names = getattr(mod, '__all__', None)
+		if names is None:
+			names = [k for k in mod.__dict__ if not k.startswith('_')]
+		for k in names:
+			self.globals[k] = getattr(mod, k)
+	
+	def imp(self, fullname):
+		if fullname in self.modules:
+			return self.modules[fullname]
+		path = self.find_module(fullname)
+		if path:
+			return self.load_module(fullname, path)
+		return None
+	
+	def fragment(self, key, ttl=None):
+		op = self.op
+		key = (key, self.depth, self.engine.formatname(op.format), op.escape, op.ugly)
+		html = self.engine.fragments.get(key)
+		if html is not None:
+			self.write(html)
+			return True
+		self.marks.append((key, ttl, len(self.html)))
+		return False
+	
+	def endfragment(self):
+		key, ttl, mark = self.marks.pop()
+		self.engine.fragments.set(key, ''.join(self.html[mark:]), ttl)
+	
+	def setdepth(self, depth):
+		self.depth = depth
 	
-	def load_module(self, fullname):
-		return self.engine.load_module(fullname, self.path, self)
+	def entab(self):
+		self.depth += 1
+	
+	def detab(self):
+		self.depth -= 1
+	
+	def indent(self):
+		self.write('\n' + '  ' * self.depth)
+	
+	def write(self, s):
+		self.html.append(s)
+	
+	def escape(self, s):
+		self.write(runtime.escape(s))
+	
+	def attrs(self, prefix, d, static):
+		self.write(prefix + runtime.attrs(d, static, self.op.xhtml))
 
-class haml_finder(object):
+class template(object):
 	
-	def __init__(self, engine):
+	def __init__(self, engine, code, op, src='', path=None, deps=()):
 		self.engine = engine
+		self.code = code
+		self.op = op
+		self.src = src
+		self.path = path
+		self.deps = deps
 	
-	def find_module(self, fullname, path=None):
-		return self.engine.find_module(fullname)
+	def render(self, context=None):
+		if self.code is None:
+			return ''
+		return self.engine.execute(self.code, self.op, context)
+	
+	def stream(self, context=None, chunk_size=None):
+		if self.code is None:
+			return iter([])
+		code = self.engine.get_code(self.src, self.path, 'stream', self.op)
+		return self.engine.execute_stream(code, self.op, context, chunk_size)
+	
+	def render_to(self, out, context=None, chunk_size=None):
+		for chunk in self.stream(context, chunk_size):
+			out.write(chunk)
 
 class engine(object):
 	
@@ -72,53 +239,114 @@ class engine(object):
 	doctypes['xhtml'][''] = doctypes['xhtml']['transitional']
 	doctypes['html4'][''] = doctypes['html4']['transitional']
 	
-	usage = 'usage: %prog [-d|--debug] [-h|--help] [-e|--escape] [(-f|--format)=(html5|html4|xhtml)]'
-	optparser = OptionParser(usage, version='%%prog %s' % __version__)
-	
-	optparser.add_option('-d', '--debug',
-		help='display debugging information',
-		action='store_true',
-		dest='debug',
-		default=False)
-
-	optparser.add_option('-f', '--format',
-		help='html output format: html5, html4, xhtml',
-		type='choice',
-		choices=['html5', 'html4', 'xhtml'],
-		default=doctypes['html5'],
-		action='callback',
-		callback=lambda op, o, v, p: setattr(p.values, 'format', engine.doctypes[v]))
-
-	optparser.add_option('-e', '--escape',
-		help='sanitize values by default',
-		action='store_true',
-		dest='escape',
-		default=False)
-	
-	optparser.add_option('-p', '--path',
-		help='haml import path',
-		default='',
-		dest='path')
-	
-	def __init__(self):
+	usage = 'usage: %prog [-d|--debug] [-h|--help] [-e|--escape] [-u|--ugly] [(-f|--format)=(html5|html4|xhtml)]'
+	optparser = None
+	
+	@staticmethod
+	def get_optparser():
+		if engine.optparser is not None:
+			return engine.optparser
+		from optparse import OptionParser
+		op = OptionParser(engine.usage, version='%%prog %s' % __version__)
+		
+		op.add_option('-d', '--debug',
+			help='display debugging information',
+			action='store_true',
+			dest='debug',
+			default=False)
+		
+		op.add_option('-f', '--format',
+			help='html output format: html5, html4, xhtml',
+			type='choice',
+			choices=['html5', 'html4', 'xhtml'],
+			default=engine.doctypes['html5'],
+			action='callback',
+			callback=lambda op, o, v, p: setattr(p.values, 'format', engine.doctypes[v]))
+		
+		op.add_option('-e', '--escape',
+			help='sanitize values by default',
+			action='store_true',
+			dest='escape',
+			default=False)
+		
+		op.add_option('-u', '--ugly',
+			help='render without indentation',
+			action='store_true',
+			dest='ugly',
+			default=False)
+		
+		op.add_option('-p', '--path',
+			help='haml import path',
+			default='',
+			dest='path')
+		
+		op.add_option('-I', '--include',
+			help='additional directory searched for haml imports',
+			action='append',
+			dest='include')
+		
+		op.add_option('-s', '--chunk-size',
+			help='size of the chunks produced when streaming',
+			type='int',
+			default=8192,
+			dest='chunk_size')
+		
+		op.add_option('-c', '--cache',
+			help='cache compiled templates on disk',
+			action='store_true',
+			dest='cache',
+			default=False)
+		
+		op.add_option('--cache-dir',
+			help='directory for the on-disk template cache',
+			default='',
+			dest='cache_dir')
+		
+		engine.optparser = op
+		return op
+	
+	def __init__(self, cache_size=256, check_interval=1.0, fragments=None, auto_reload=False):
+		from . import lexer, parser
+		from .ply import lex, yacc
 		self.parser = yacc.yacc(
 			module=parser,
+			tabmodule='%s.parsetab' % __package__,
 			write_tables=False,
 			debug=False)
-		self.lexer = lex.lex(module=lexer)
+		self.lexer = self.build_lexer(lex, lexer)
+		self.cache = LRU(cache_size)
+		self.partials = LRU(cache_size)
+		self.templates = LRU(cache_size)
+		self.fragments = cache.TTLCache(cache_size) if fragments is None else fragments
+		self.lock = threading.RLock()
+		self.builtins = dict(builtins.__dict__)
+		self.builtins['__import__'] = self.import_
+		self.index = template_index(check_interval)
+		self.check_interval = check_interval
+		self.auto_reload = auto_reload
 	
-	def reset(self):
-		self.depth = 0
-		self.html = []
-		self.globals = {
-			'__write__': self.write,
-			'__escape__': self.escape,
-			'__attrs__': self.attrs,
-			'__indent__': self.indent,
-			'__entab__': self.entab,
-			'__detab__': self.detab,
-			'__imp__': self.imp,
-		}
+	def build_lexer(self, lex, lexer):
+		try:
+			from . import lextab
+		except ImportError:
+			lextab = None
+		if getattr(lextab, '_lexsignature', None) == lexer.signature():
+			return lex.lex(module=lexer, optimize=1, lextab=lextab)
+		return lex.lex(module=lexer)
+	
+	helpers = (
+		'__write__',
+		'__escape__',
+		'__attrs__',
+		'__indent__',
+		'__entab__',
+		'__detab__',
+		'__imp__',
+		'__fragment__',
+		'__endfragment__',
+		'__depth__',
+		'__star__',
+	)
 	
 	def setops(self, *args, **kwargs):
 		if 'args' in kwargs:
@@ -127,113 +355,366 @@ class engine(object):
 			argv = []
 			for k,v in kwargs.items():
 				if isinstance(v, bool):
-					argv += ['--' + k] if v else []
+					argv += ['--' + k.replace('_', '-')] if v else []
+				elif isinstance(v, (list, tuple)):
+					for item in v:
+						argv += ['--' + k.replace('_', '-'), str(item)]
 				else:
-					argv += ['--' + k, str(v)]
-		self.op, _ = engine.optparser.parse_args(argv)
+					argv += ['--' + k.replace('_', '-'), str(v)]
+		self.op, _ = engine.get_optparser().parse_args(argv)
+		self.op.include = self.op.include or []
+		self.op.xhtml = self.op.format is engine.doctypes['xhtml']
+		return self.op
 	
-	def find_module(self, fullname):
-		dir = os.path.dirname(self.op.path)
-		path = os.path.join(dir, '%s.haml' % fullname)
-		if os.path.exists(path):
-			return haml_loader(self, path)
-		return None
+	def parse(self, s, stream=False, parent=None, path=None, overrides=None, module=False):
+		from .lexer import Tabs
+		parser = copy.copy(self.parser)
+		lexer = self.lexer.clone()
+		parser.stream = stream
+		parser.scope = parent.scope if parent else 0
+		parser.pending_scope = parser.scope
+		parser.depth = 0
+		parser.src = []
+		parser.literal = []
+		parser.tabs = 0
+		parser.pending_depth = 0
+		parser.trim_next = False
+		parser.last_obj = None
+		parser.to_close = []
+		parser.debug = self.op.debug
+		parser.op = self.op
+		parser.include = self.include
+		parser.extends = None
+		parser.level = 0
+		parser.synced = None
+		parser.syncs = 0
+		parser.marks = []
+		parser.decorated = False
+		if parent is None:
+			parser.deps = []
+			parser.stack = [os.path.abspath(self.op.path)] if self.op.path else []
+			parser.overrides = {}
+			parser.blocks = {}
+			parser.module = module
+			parser.static = not module
+			parser.synced = 0
+		elif overrides is None:
+			parser.deps = parent.deps
+			parser.stack = parent.stack + [os.path.abspath(path)]
+			parser.overrides = parent.overrides
+			parser.blocks = parent.blocks
+			parser.module = parent.module
+			parser.static = parent.static
+			parser.level = parent.level
+		else:
+			parser.deps = parent.deps
+			parser.stack = parent.stack + [os.path.abspath(path)]
+			parser.overrides = overrides
+			parser.blocks = {}
+			parser.module = parent.module
+			parser.static = not parent.module
+		
+		lexer.begin('INITIAL')
+		lexer.tabs = Tabs()
+		lexer.depth = 0
+		
+		parser.parse(s, lexer=lexer, debug=self.op.debug)
+		if parser.extends:
+			blocks = dict(parser.overrides)
+			blocks.update(parser.blocks)
+			parser.src = self.include(parser, parser.extends, blocks)
+		return parser
+	
+	def compile(self, s, stream=False):
+		return '\n'.join(self.parse(s, stream).src)
 	
-	def load_module(self, fullname, path, loader):
+	def include(self, parser, name, overrides=None):
+		path = self.find(parser.op, name)
+		if path is None:
+			raise Exception('template not found: %s' % name)
+		if os.path.abspath(path) in parser.stack:
+			raise Exception('recursive include: %s' % name)
 		f = open(path)
 		try:
-			src = f.read()
+			s = f.read()
 		finally:
 			f.close()
-		mod = imp.new_module(fullname)
-		mod = sys.modules.setdefault(fullname, mod)
-		mod.__file__ = path
-		mod.__loader__ = loader
-		src = self.compile(src)
-		mod.__dict__.update(self.globals)
-		ex(src, mod.__dict__)
-		return mod
+		parser.deps.append((path, os.stat(path).st_mtime))
+		return self.parse(s.strip(), parser.stream, parser, path, overrides).src
 	
-	def imp(self, fullname):
-		finder = haml_finder(self)
-		loader = finder.find_module(fullname)
-		if loader:
-			return loader.load_module(fullname)
+	def formatname(self, format):
+		for k,v in engine.doctypes.items():
+			if v is format:
+				return k
 		return None
 	
-	def entab(self):
-		self.depth += 1
+	def opkey(self):
+		return (self.op.escape,
+			self.formatname(self.op.format),
+			self.op.debug,
+			self.op.ugly,
+			tuple(self.dirs(self.op)))
 	
-	def detab(self):
-		self.depth -= 1
+	def cachekey(self, s, mode='function'):
+		return (digest(s), mode) + self.opkey()
 	
-	def indent(self):
-		self.write('\n' + '  ' * self.depth)
+	def cachepath(self, path, mode='function'):
+		path = os.path.abspath(path)
+		dir = self.op.cache_dir
+		if not dir:
+			dir = os.path.join(os.path.dirname(path), '__hamlcache__')
+		key = digest(repr((path, mode) + self.opkey()))[:16]
+		return os.path.join(dir, '%s.%s.hamlc' % (os.path.basename(path), key))
 	
-	def write(self, s):
-		self.html.append(s)
+	def get_code(self, s, path=None, mode='function', op=None):
+		return self.lookup(s, path, mode, op)[0]
 	
-	def escape(self, s):
-		self.write(cgi.escape(s, True))
-	
-	def attrs(self, *args):
-		attrs = {}
-		for a in args:
-			attrs.update(a)
-		for k,v in attrs.items():
-			self.write(' %s="%s"' % (k, str(v).replace('"', '&quot;')))
-	
-	def compile(self, s):
-		self.parser.depth = 0
-		self.parser.src = []
-		self.parser.trim_next = False
-		self.parser.last_obj = None
-		self.parser.debug = self.op.debug
-		self.parser.op = self.op
-		
-		self.lexer.begin('INITIAL')
-		self.lexer.tabs = lexer.Tabs()
-		self.lexer.depth = 0
-		
-		self.parser.parse(s, lexer=self.lexer, debug=self.op.debug)
-		return '\n'.join(self.parser.src)
+	def lookup(self, s, path=None, mode='function', op=None):
+		self.lock.acquire()
+		try:
+			if op is not None:
+				self.op = op
+			key = self.cachekey(s, mode)
+			entry = self.cache.get(key)
+			if entry is None or not self.fresh(entry[1]):
+				if path and (self.op.cache or self.op.cache_dir):
+					entry = self.get_file_code(s, path, mode)
+				else:
+					entry = (self.build(s, mode), self.deps)
+				self.cache.set(key, entry)
+			return entry
+		finally:
+			self.lock.release()
 	
-	def to_html(self, s, *args, **kwargs):
-		s = s.strip()
-		if s == '':
-			return ''
-		
-		self.reset()
-		self.setops(*args, **kwargs)
-		
-		if len(args) > 0:
-			self.globals.update(args[0])
-		
-		src = self.compile(s)
+	def get_partial(self, path, op):
+		self.lock.acquire()
+		try:
+			self.op = op
+			key = (path,) + self.opkey()
+			code = self.revalidate(self.partials, key)
+			if code is None:
+				mtime = os.stat(path).st_mtime
+				f = open(path)
+				try:
+					s = f.read()
+				finally:
+					f.close()
+				code, deps = self.lookup(s, path, 'module', op)
+				self.partials.set(key, (time.time(), [(path, mtime)] + deps, code))
+			return code
+		finally:
+			self.lock.release()
+	
+	def revalidate(self, lru, key):
+		entry = lru.get(key)
+		if entry is None:
+			return None
+		checked, deps, value = entry
+		now = time.time()
+		if self.auto_reload and now - checked < self.check_interval:
+			return value
+		if not self.fresh(deps):
+			return None
+		lru.set(key, (now, deps, value))
+		return value
+	
+	def get_file_code(self, s, path, mode='function'):
+		from . import parser
+		st = os.stat(path)
+		stamp = (cache.magic(), __version__, parser.codegen, engine.helpers, st.st_mtime, st.st_size)
+		cachepath = self.cachepath(path, mode)
+		entry = cache.load(cachepath, stamp)
+		if entry is None or not self.fresh(entry[1]):
+			entry = (self.build(s, mode), self.deps)
+			cache.dump(cachepath, stamp, entry)
+		return entry
+	
+	def fresh(self, deps):
+		try:
+			for path, mtime in deps:
+				if os.stat(path).st_mtime != mtime:
+					return False
+		except OSError:
+			return False
+		return True
+	
+	def build(self, s, mode='function'):
+		parser = self.parse(s, stream=(mode == 'stream'), module=(mode == 'module'))
+		self.deps = parser.deps
+		if mode == 'module':
+			src = '\n'.join(parser.src)
+		else:
+			src = self.function(parser.src, stream=(mode == 'stream'))
 		if self.op.debug:
 			sys.stdout.write(src)
-		finder = haml_finder(self)
-		sys.meta_path.append(finder)
+		code = compile(src, '<haml>', 'exec')
+		if mode != 'module':
+			code = [c for c in code.co_consts if isinstance(c, types.CodeType)][0]
+		return code
+	
+	def function(self, lines, stream=False):
+		import symtable
+		head = 'def __haml__(%s):' % ', '.join(engine.helpers + ('__out__', '__ctx__'))
+		body = [' ' + l for l in lines] or [' pass']
+		if stream:
+			body += [' yield __out__.flush()']
+		table = symtable.symtable('\n'.join([head] + body), '<haml>', 'exec').get_children()[0]
+		declared = set(sym.get_name() for sym in table.get_symbols()
+			if sym.is_declared_global())
+		names = set(sym.get_name() for sym in table.get_symbols()
+			if sym.is_local() and not sym.is_parameter()) - declared
+		shared = sorted((names & self.globalnames(table)) | declared)
+		prologue = [' global %s' % ', '.join(shared)] if shared else []
+		prologue += [' if %r in __ctx__: %s = __ctx__[%r]' % (n, n, n)
+			for n in sorted(names - set(shared))]
+		return '\n'.join([head] + prologue + body)
+	
+	def globalnames(self, table):
+		names = set()
+		for child in table.get_children():
+			names.update(sym.get_name() for sym in child.get_symbols()
+				if sym.is_declared_global())
+			names.update(self.globalnames(child))
+		return names
+	
+	def compile_template(self, s, *args, **kwargs):
+		return self.make_template(s, None, *args, **kwargs)
+	
+	def load_template(self, path, *args, **kwargs):
+		if not self.auto_reload:
+			return self.read_template(path, *args, **kwargs)
+		key = (os.path.abspath(path), repr(sorted(kwargs.items())))
+		self.lock.acquire()
 		try:
-			ex(src, self.globals, {})
-			return ''.join(self.html).strip() + '\n'
+			t = self.revalidate(self.templates, key)
+			if t is None:
+				mtime = os.stat(path).st_mtime
+				t = self.read_template(path, *args, **kwargs)
+				self.templates.set(key, (time.time(), [(path, mtime)] + t.deps, t))
+			return t
 		finally:
-			sys.meta_path.remove(finder)
+			self.lock.release()
 	
-	def render(self, path, *args, **kwargs):
+	def read_template(self, path, *args, **kwargs):
 		f = open(path)
 		try:
-			return self.to_html(f.read(), path=path, *args, **kwargs)
+			s = f.read()
 		finally:
 			f.close()
+		return self.make_template(s, path, path=path, *args, **kwargs)
+	
+	def make_template(self, s, filename, *args, **kwargs):
+		s = s.strip()
+		self.lock.acquire()
+		try:
+			op = self.setops(*args, **kwargs)
+			if s == '':
+				return template(self, None, op)
+			code, deps = self.lookup(s, filename, 'function', op)
+			return template(self, code, op, s, filename, deps)
+		finally:
+			self.lock.release()
+	
+	def import_(self, name, globals=None, locals=None, fromlist=(), level=0):
+		context = globals.get('__context__') if globals else None
+		if context is not None:
+			return context.import_(name, globals, locals, fromlist, level)
+		return builtins.__import__(name, globals, locals, fromlist, level)
+	
+	def dirs(self, op):
+		return [os.path.dirname(op.path)] + op.include
+	
+	def find(self, op, fullname):
+		return self.index.find(fullname, self.dirs(op))
+	
+	def refresh(self):
+		self.index.refresh()
+	
+	def execute(self, code, op, context=None):
+		ctx = render_context(self, op, context)
+		f = types.FunctionType(code, ctx.globals)
+		f(*ctx.args())
+		return ''.join(ctx.html).strip() + '\n'
+	
+	def execute_stream(self, code, op, context=None, chunk_size=None):
+		ctx = render_context(self, op, context,
+			chunk_buffer(chunk_size or op.chunk_size))
+		f = types.FunctionType(code, ctx.globals)
+		head = True
+		tail = ''
+		for chunk in f(*ctx.args()):
+			if head:
+				chunk = chunk.lstrip()
+				head = not chunk
+			chunk = tail + chunk
+			s = chunk.rstrip()
+			tail = chunk[len(s):]
+			if s:
+				yield s
+		yield '\n'
+	
+	def stream(self, s, *args, **kwargs):
+		if s.endswith('.haml') and os.path.isfile(s):
+			t = self.load_template(s, *args, **kwargs)
+		else:
+			t = self.compile_template(s, *args, **kwargs)
+		return t.stream(args[0] if len(args) > 0 else None)
+	
+	def to_html_into(self, s, out, *args, **kwargs):
+		t = self.compile_template(s, *args, **kwargs)
+		t.render_to(out, args[0] if len(args) > 0 else None)
+	
+	def render_to(self, path, out, *args, **kwargs):
+		t = self.load_template(path, *args, **kwargs)
+		t.render_to(out, args[0] if len(args) > 0 else None)
+	
+	def to_html(self, s, *args, **kwargs):
+		t = self.compile_template(s, *args, **kwargs)
+		return t.render(args[0] if len(args) > 0 else None)
+	
+	def render(self, path, *args, **kwargs):
+		t = self.load_template(path, *args, **kwargs)
+		return t.render(args[0] if len(args) > 0 else None)
+
+en = None
+en_lock = threading.Lock()
+
+def default_engine():
+	global en
+	if en is None:
+		en_lock.acquire()
+		try:
+			if en is None:
+				en = engine()
+		finally:
+			en_lock.release()
+	return en
+
+def to_html(*args, **kwargs):
+	return default_engine().to_html(*args, **kwargs)
+
+def render(*args, **kwargs):
+	return default_engine().render(*args, **kwargs)
+
+def compile_template(*args, **kwargs):
+	return default_engine().compile_template(*args, **kwargs)
+
+def load_template(*args, **kwargs):
+	return default_engine().load_template(*args, **kwargs)
+
+def stream(*args, **kwargs):
+	return default_engine().stream(*args, **kwargs)
+
+def to_html_into(*args, **kwargs):
+	return default_engine().to_html_into(*args, **kwargs)
 
-en = engine()
-to_html = en.to_html
-render = en.render
+def render_to(*args, **kwargs):
+	return default_engine().render_to(*args, **kwargs)
 
 if __name__ == '__main__':
+	en = default_engine()
 	en.setops(args=sys.argv[1:])
 	if en.op.path:
-		sys.stdout.write(render(en.op.path, args=sys.argv[1:]))
+		render_to(en.op.path, sys.stdout, args=sys.argv[1:])
 	else:
-		sys.stdout.write(to_html(sys.stdin.read(), args=sys.argv[1:]))
+		to_html_into(sys.stdin.read(), sys.stdout, args=sys.argv[1:])
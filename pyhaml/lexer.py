@@ -4,6 +4,7 @@ import sys
 import token
 
 from .patch import toks, untokenize
+from .cache import digest
 
 class Tabs(object):
 	def __init__(self):
@@ -70,45 +71,88 @@ states = (
 literals = '":,{}<>/'
 t_ANY_ignore = '\r'
 
+def signature():
+	funcs = []
+	strs = []
+	for k,v in globals().items():
+		if not k.startswith('t_'):
+			continue
+		if callable(v):
+			funcs.append((v.__code__.co_firstlineno, k, v.__doc__))
+		else:
+			strs.append((k, v))
+	funcs = [f[1:] for f in sorted(funcs)]
+	return digest(repr((tokens, states, literals, funcs, sorted(strs))))
+
+def writetab(lexer, tabmodule, outputdir):
+	basename = tabmodule.split('.')[-1]
+	try:
+		lexer.writetab(tabmodule, outputdir)
+		f = open(os.path.join(outputdir, basename) + '.py', 'a')
+		try:
+			f.write('_lexsignature = %s\n' % repr(signature()))
+		finally:
+			f.close()
+	except (IOError, OSError):
+		pass
+
 def build(self, **kwargs):
 	self.lexer.depth = 0
 	self.tabs = Tabs()
 	return self
 
-def pytokens(t):
-	for tok in toks(t.lexer.lexdata[t.lexer.lexpos:]):
-		_, s, _, (_, ecol), _ = tok
-		yield tok
-		for _ in range(s.count('\n')):
-			t.lexer.lineno += 1
-			t.lexer.lexpos = t.lexer.lexdata.find('\n', t.lexer.lexpos+1) + 1
+class pytokens(object):
+	
+	def __init__(self, t):
+		self.t = t
+		self.data = t.lexer.lexdata
+		self.starts = [t.lexer.lexpos]
+	
+	def readline(self):
+		pos = self.starts[-1]
+		if pos >= len(self.data):
+			return ''
+		end = self.data.find('\n', pos) + 1 or len(self.data)
+		self.starts.append(end)
+		return self.data[pos:end]
+	
+	def offset(self, pos):
+		row, col = pos
+		return self.starts[row - 1] + col
+	
+	def __iter__(self):
+		for tok in toks(self.readline):
+			self.t.lexer.lineno += tok[1].count('\n')
+			yield tok
 
 def read_dict(t):
 	t.value = []
 	lvl = 0
-	for tok in pytokens(t):
-		_, s, _, (_, ecol), _ = tok
+	g = pytokens(t)
+	for tok in g:
+		_, s, _, end, _ = tok
 		t.value += [tok]
 		if s == '{':
 			lvl += 1
 		elif s == '}':
 			lvl -= 1
 			if lvl == 0:
-				t.lexer.lexpos += ecol
+				t.lexer.lexpos = g.offset(end)
 				t.value = untokenize(t.value)
 				return t
 
 def read_script(t):
 	src = []
-	for tok in pytokens(t):
-		type, s, _, (_, ecol), _ = tok
+	g = pytokens(t)
+	for tok in g:
+		type, s, _, end, _ = tok
 		if s == '':
 			t.lexer.lexpos = len(t.lexer.lexdata)
 			src = untokenize(src).strip()
 			return src
 		src += [tok]
 		if type == token.NEWLINE:
-			t.lexer.lexpos += ecol - 1
+			t.lexer.lexpos = g.offset(end) - 1
 			src = untokenize(src).strip()
 			return src
 
@@ -0,0 +1,10 @@
+# pyhaml.lextab.py. This file automatically created by PLY (version 3.3). Don't edit!
+_tabversion   = '3.3'
+_lextokens    = {'LF': 1, 'DOCTYPE': 1, 'HTMLTYPE': 1, 'XMLTYPE': 1, 'TAGNAME': 1, 'ID': 1, 'CLASSNAME': 1, 'VALUE': 1, 'TRIM': 1, 'DICT': 1, 'SCRIPT': 1, 'SILENTSCRIPT': 1, 'COMMENT': 1, 'CONDCOMMENT': 1, 'TYPE': 1}
+_lexreflags   = 0
+_lexliterals  = '":,{}<>/'
+_lexstateinfo = {'INITIAL': 'inclusive', 'tag': 'exclusive', 'silent': 'exclusive', 'doctype': 'exclusive', 'comment': 'exclusive', 'tabs': 'exclusive', 'multi': 'exclusive', 'script': 'exclusive'}
+_lexstatere   = {'INITIAL': [('(?P<t_tag_doctype_comment_INITIAL_LF>\\n)|(?P<t_silentcomment>-\\#[^\\n]*)|(?P<t_DOCTYPE>!!!)|(?P<t_VALUE>[^=&/#!.%\\n\\t -][^\\n]*)|(?P<t_CONDCOMMENT>/\\[[^\\]]+\\])|(?P<t_COMMENT>/)|(?P<t_TAGNAME>%[a-zA-Z][a-zA-Z0-9]*)|(?P<t_tag_INITIAL_ID>\\#[a-zA-Z][a-zA-Z0-9]*)|(?P<t_tag_INITIAL_CLASSNAME>\\.[a-zA-Z-][a-zA-Z0-9-]*)|(?P<t_SILENTSCRIPT>-)|(?P<t_tag_INITIAL_TYPE>[ ]*(&|!)?=)', [None, ('t_tag_doctype_comment_INITIAL_LF', 'LF'), ('t_silentcomment', 'silentcomment'), ('t_DOCTYPE', 'DOCTYPE'), ('t_VALUE', 'VALUE'), ('t_CONDCOMMENT', 'CONDCOMMENT'), ('t_COMMENT', 'COMMENT'), ('t_TAGNAME', 'TAGNAME'), ('t_tag_INITIAL_ID', 'ID'), ('t_tag_INITIAL_CLASSNAME', 'CLASSNAME'), ('t_SILENTSCRIPT', 'SILENTSCRIPT'), ('t_tag_INITIAL_TYPE', 'TYPE')])], 'tag': [('(?P<t_tag_doctype_comment_INITIAL_LF>\\n)|(?P<t_tag_INITIAL_ID>\\#[a-zA-Z][a-zA-Z0-9]*)|(?P<t_tag_INITIAL_CLASSNAME>\\.[a-zA-Z-][a-zA-Z0-9-]*)|(?P<t_tag_DICT>[ ]*{)|(?P<t_tag_INITIAL_TYPE>[ ]*(&|!)?=)|(?P<t_tag_TRIM><>|><|<|>)|(?P<t_tag_VALUE>[ \\t]*[^{}<>=&/#!.%\\n\\t -][^\\n]*)', [None, ('t_tag_doctype_comment_INITIAL_LF', 'LF'), ('t_tag_INITIAL_ID', 'ID'), ('t_tag_INITIAL_CLASSNAME', 'CLASSNAME'), ('t_tag_DICT', 'DICT'), ('t_tag_INITIAL_TYPE', 'TYPE'), None, ('t_tag_TRIM', 'TRIM'), ('t_tag_VALUE', 'VALUE')])], 'silent': [('(?P<t_silent_LF>\\n)|(?P<t_silent_other>[^\\n]+)', [None, ('t_silent_LF', 'LF'), ('t_silent_other', 'other')])], 'doctype': [('(?P<t_tag_doctype_comment_INITIAL_LF>\\n)|(?P<t_doctype_XMLTYPE>[ ]+XML([ ]+[^\\n]+)?)|(?P<t_doctype_HTMLTYPE>[ ]+(strict|frameset|mobile|basic|transitional))', [None, ('t_tag_doctype_comment_INITIAL_LF', 'LF'), ('t_doctype_XMLTYPE', 'XMLTYPE'), None, ('t_doctype_HTMLTYPE', 'HTMLTYPE')])], 'comment': [('(?P<t_tag_doctype_comment_INITIAL_LF>\\n)|(?P<t_comment_VALUE>[^\\n]+)', [None, ('t_tag_doctype_comment_INITIAL_LF', 'LF'), ('t_comment_VALUE', 'VALUE')])], 'tabs': [('(?P<t_tabs_other>[^ \\t])|(?P<t_tabs_indent>[ \\t]+)', [None, ('t_tabs_other', 'other'), ('t_tabs_indent', 'indent')])], 'multi': [('(?P<t_multi_newline>\\n+)|(?P<t_multi_VALUE>[^\\n]+)', [None, ('t_multi_newline', 'newline'), ('t_multi_VALUE', 'VALUE')])], 'script': [('(?P<t_script_SCRIPT>=)', [None, ('t_script_SCRIPT', 'SCRIPT')])]}
+_lexstateignore = {'INITIAL': '\r', 'tag': '\r', 'silent': '\r', 'doctype': '\r', 'comment': '\r', 'tabs': '\r', 'multi': '\r', 'script': '\r'}
+_lexstateerrorf = {'INITIAL': 't_ANY_error', 'tag': 't_ANY_error', 'silent': 't_ANY_error', 'doctype': 't_ANY_error', 'comment': 't_ANY_error', 'tabs': 't_ANY_error', 'multi': 't_ANY_error', 'script': 't_ANY_error'}
+_lexsignature = '7b8ab25fec65c6e71ce5b7e69a4c1baa325b4b90'
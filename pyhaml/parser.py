@@ -1,5 +1,13 @@
+import re
 import sys
+import ast
+import operator
 from .lexer import tokens
+from . import runtime
+from .patch import integers
+
+# bump when generated code or the runtime helpers it calls change
+codegen = 6
 
 class haml_obj(object):
 	
@@ -22,10 +30,10 @@ class haml_obj(object):
 		deblock(self.parser, *args, **kwargs)
 	
 	def entab(self):
-		script(self.parser, '__entab__()')
+		tab(self.parser, 1)
 	
 	def detab(self):
-		script(self.parser, '__detab__()')
+		tab(self.parser, -1)
 	
 	def open(self):
 		pass
@@ -72,9 +80,20 @@ class Script(haml_obj):
 
 class SilentScript(haml_obj):
 	
+	scope_re = re.compile(r'(async\s+)?(def|class)\b')
+	clause_re = re.compile(r'(else|elif|except|finally)\b')
+	loop_re = re.compile(r'(async\s+)?(for|while)\b')
+	star_re = re.compile(r'from\s+(\w[\w.]*)\s+import\s*\*\s*$')
+	
 	def __init__(self, parser, value=''):
 		haml_obj.__init__(self, parser)
 		self.value = value
+		self.scope = bool(SilentScript.scope_re.match(value))
+		self.loop = bool(SilentScript.loop_re.match(value))
+		self.decorator = value.startswith('@')
+		m = SilentScript.star_re.match(value)
+		if m and not parser.module:
+			self.value = '__star__(%r)' % m.group(1)
 	
 	def entab(self):
 		pass
@@ -83,11 +102,117 @@ class SilentScript(haml_obj):
 		pass
 	
 	def open(self):
+		decorated = self.parser.decorated
+		self.parser.decorated = self.decorator
+		if not SilentScript.clause_re.match(self.value) and not decorated:
+			sync(self.parser)
 		self.script(self.value)
+		if not self.value.rstrip().endswith(':') and not self.decorator:
+			checkpoint(self.parser, self.parser.depth, self.parser.scope)
+		if self.scope:
+			self.parser.scope += 1
 		self.enblock()
 	
 	def close(self):
+		self.deblock(self.loop)
+		if self.scope:
+			self.parser.scope -= 1
+
+class Include(haml_obj):
+	
+	def __init__(self, parser, name):
+		haml_obj.__init__(self, parser)
+		self.name = name
+	
+	def entab(self):
+		pass
+	
+	def detab(self):
+		pass
+	
+	def open(self):
+		lines = self.parser.include(self.parser, self.name)
+		splice(self.parser, lines)
+		unsync(self.parser)
+	
+	def close(self):
+		self.no_nesting()
+
+class Extends(haml_obj):
+	
+	def __init__(self, parser, name):
+		haml_obj.__init__(self, parser)
+		self.name = name
+	
+	def entab(self):
+		pass
+	
+	def detab(self):
+		pass
+	
+	def open(self):
+		if self.parser.extends:
+			self.error('multiple layouts')
+		self.parser.extends = self.name
+		self.parser.static = False
+	
+	def close(self):
+		self.no_nesting()
+
+class Block(haml_obj):
+	
+	def __init__(self, parser, name):
+		haml_obj.__init__(self, parser)
+		self.name = name
+		self.start = 0
+	
+	def entab(self):
+		pass
+	
+	def detab(self):
+		pass
+	
+	def open(self):
+		flush(self.parser)
+		self.start = len(self.parser.src)
+	
+	def close(self):
+		parser = self.parser
+		flush(parser)
+		if self.name in parser.overrides:
+			del parser.src[self.start:]
+			sync(parser)
+			lines = parser.overrides[self.name]
+			if parser.scope:
+				lines = [l for l in lines if l.strip() != yield_line]
+			splice(parser, lines)
+			unsync(parser)
+		elif len(parser.src) == self.start:
+			splice(parser, [])
+		parser.blocks[self.name] = [l[parser.depth:] for l in parser.src[self.start:]]
+
+class Fragment(haml_obj):
+	
+	def __init__(self, parser, args):
+		haml_obj.__init__(self, parser)
+		self.args = args
+	
+	def entab(self):
+		pass
+	
+	def detab(self):
+		pass
+	
+	def open(self):
+		sync(self.parser)
+		self.script('if not __fragment__(%s):' % self.args)
+		self.parser.scope += 1
+		self.enblock()
+	
+	def close(self):
+		self.script('__endfragment__()')
 		self.deblock()
+		self.parser.scope -= 1
 
 class Doctype(haml_obj):
 	
@@ -167,6 +292,18 @@ class Tag(haml_obj):
 		else:
 			self.attrs['class'] += ' ' + s
 	
+	def static_attrs(self):
+		if self.dict == '{}':
+			d = {}
+		else:
+			try:
+				d = constant(self.dict)
+			except Exception:
+				return None
+			if not isinstance(d, dict):
+				return None
+		return runtime.attrs(d, self.attrs, self.parser.op.xhtml)
+	
 	def is_last(self):
 		return self.parser.last_obj is self
 	
@@ -192,11 +329,19 @@ class Tag(haml_obj):
 		if self.self_close and self.value:
 			self.error('self-closing tags cannot have content')
 		
+		attrs = self.static_attrs()
+		if attrs is None:
+			sync(self.parser)
 		self.push('<' + self.tagname,
 			inner=self.inner,
 			outer=self.outer,
 			literal=True)
-		self.script('__attrs__(%s, %s)' % (self.dict, repr(self.attrs)))
+		if attrs is None:
+			prefix = take(self.parser)
+			self.script('__attrs__(%r, %s, %r)' % (prefix, self.dict, self.attrs))
+			checkpoint(self.parser, self.parser.depth, self.parser.scope)
+		else:
+			self.write(attrs, literal=True)
 		
 		if self.value:
 			self.write('>', literal=True)
@@ -223,29 +368,215 @@ class Tag(haml_obj):
 		else:
 			self.push('</' + self.tagname + '>', inner=self.outer, outer=self.inner, literal=True)
 
+fold_limit = 4096
+
+binops = {
+	ast.Add: operator.add,
+	ast.Sub: operator.sub,
+	ast.Mult: operator.mul,
+	ast.Div: operator.truediv,
+	ast.FloorDiv: operator.floordiv,
+	ast.Mod: operator.mod,
+	ast.Pow: operator.pow,
+	ast.LShift: operator.lshift,
+	ast.RShift: operator.rshift,
+	ast.BitOr: operator.or_,
+	ast.BitXor: operator.xor,
+	ast.BitAnd: operator.and_,
+}
+
+unaryops = {
+	ast.UAdd: operator.pos,
+	ast.USub: operator.neg,
+	ast.Not: operator.not_,
+	ast.Invert: operator.invert,
+}
+
+# the literal node classes differ between versions, so look each one up
+literals = [(vars(ast)[name], attr) for name, attr in (
+	('Constant', 'value'),
+	('Str', 's'),
+	('Bytes', 's'),
+	('Num', 'n'),
+	('NameConstant', 'value'),
+) if name in vars(ast)]
+
+names = {'True': True, 'False': False, 'None': None}
+
+format_re = re.compile(r'%[^a-zA-Z%]*[0-9*]')
+
+class NotConstant(Exception):
+	pass
+
+def limit(v):
+	if isinstance(v, (str, bytes, tuple, list, dict, set)) and len(v) > fold_limit:
+		raise NotConstant(v)
+	if isinstance(v, integers) and abs(v).bit_length() > fold_limit:
+		raise NotConstant(v)
+	return v
+
+def evaluate(node):
+	if isinstance(node, ast.Expression):
+		return evaluate(node.body)
+	for cls, attr in literals:
+		if isinstance(node, cls):
+			return limit(getattr(node, attr))
+	if isinstance(node, ast.Name) and node.id in names:
+		return names[node.id]
+	if isinstance(node, ast.Tuple):
+		return limit(tuple(evaluate(e) for e in node.elts))
+	if isinstance(node, ast.List):
+		return limit([evaluate(e) for e in node.elts])
+	if isinstance(node, ast.Set):
+		return limit(set(evaluate(e) for e in node.elts))
+	if isinstance(node, ast.Dict) and None not in node.keys:
+		return limit(dict((evaluate(k), evaluate(v)) for k, v in zip(node.keys, node.values)))
+	if isinstance(node, ast.UnaryOp) and type(node.op) in unaryops:
+		return limit(unaryops[type(node.op)](evaluate(node.operand)))
+	if isinstance(node, ast.BinOp) and type(node.op) in binops:
+		left = evaluate(node.left)
+		right = evaluate(node.right)
+		op = type(node.op)
+		if op is ast.Mult:
+			for a, b in ((left, right), (right, left)):
+				if isinstance(a, (str, bytes, tuple, list)) and isinstance(b, integers):
+					if len(a) * b > fold_limit:
+						raise NotConstant(node)
+		elif op is ast.Pow and isinstance(left, integers) and isinstance(right, integers):
+			if abs(right) > 128 or abs(left).bit_length() * abs(right) > fold_limit:
+				raise NotConstant(node)
+		elif op is ast.LShift and isinstance(right, integers) and right > fold_limit:
+			raise NotConstant(node)
+		elif op is ast.Mod and isinstance(left, (str, bytes)) and format_re.search(str(left)):
+			raise NotConstant(node)
+		return limit(binops[op](left, right))
+	raise NotConstant(node)
+
+def constant(code):
+	return evaluate(ast.parse(code.strip(), mode='eval'))
+
+def fold(code):
+	try:
+		s = str(constant(code))
+	except Exception:
+		return None
+	if len(s) > fold_limit:
+		return None
+	return s
+
 def enblock(parser):
 	parser.depth += 1
-
-def deblock(parser):
+	parser.marks.append((parser.syncs, parser.synced, len(parser.src)))
+
+def deblock(parser, loop=False):
+	syncs, synced, start = parser.marks.pop()
+	if parser.syncs != syncs:
+		if loop and synced is not None:
+			pre = ' ' * parser.depth
+			parser.src.insert(start, pre + '__depth__(%d)' % synced)
+		unsync(parser)
 	parser.depth -= 1
 
 def push(parser, s, inner=False, outer=False, **kwargs):
 	if outer or parser.trim_next:
 		write(parser, s, **kwargs)
+	elif parser.op.ugly:
+		write(parser, '\n', literal=True)
+		write(parser, s, **kwargs)
+	elif static(parser):
+		write(parser, '\n' + '  ' * parser.level, literal=True)
+		write(parser, s, **kwargs)
 	else:
 		script(parser, '__indent__()')
 		write(parser, s, **kwargs)
 	parser.trim_next = inner
 
 def write(parser, s, literal=False, escape=False):
-	s = repr(s) if literal else 'str(%s)' % s
+	if not literal:
+		value = fold(s)
+		if value is not None:
+			s = runtime.escape(value) if escape else value
+			literal = True
+			escape = False
+	if literal and not escape:
+		pending(parser)
+		parser.literal.append(s)
+		return
+	if not literal:
+		sync(parser)
+	if literal:
+		s = repr(s)
+	elif not escape:
+		s = 'str(%s)' % s
 	f = '__escape__' if escape else '__write__'
 	script(parser, '%s(%s)' % (f, s))
+	checkpoint(parser, parser.depth, parser.scope)
+
+def tab(parser, n):
+	if parser.op.ugly:
+		return
+	if static(parser):
+		parser.level += n
+		return
+	pending(parser)
+	parser.tabs += n
+
+def static(parser):
+	return parser.static and not parser.scope
+
+def sync(parser):
+	if parser.op.ugly or not static(parser) or parser.synced == parser.level:
+		return
+	script(parser, '__depth__(%d)' % parser.level)
+	parser.synced = parser.level
+	parser.syncs += 1
+
+def unsync(parser):
+	parser.synced = None
+	parser.syncs += 1
+
+def pending(parser):
+	if parser.pending_depth != parser.depth:
+		flush(parser)
+		parser.pending_depth = parser.depth
+		parser.pending_scope = parser.scope
+
+def take(parser):
+	pending(parser)
+	s = ''.join(parser.literal)
+	parser.literal = []
+	return s
+
+def flush(parser):
+	pre = ' ' * parser.pending_depth
+	if parser.literal:
+		s = ''.join(parser.literal)
+		parser.src += [pre + '__write__(%s)' % repr(s)]
+		parser.literal = []
+		checkpoint(parser, parser.pending_depth, parser.pending_scope)
+	if parser.tabs > 0:
+		parser.src += [pre + '__entab__()'] * parser.tabs
+	elif parser.tabs < 0:
+		parser.src += [pre + '__detab__()'] * -parser.tabs
+	parser.tabs = 0
+
+yield_line = 'if __out__.length >= __out__.size: yield __out__.flush()'
+
+def checkpoint(parser, depth, scope):
+	if parser.stream and not scope:
+		pre = ' ' * depth
+		parser.src += [pre + yield_line]
 
 def script(parser, s):
+	flush(parser)
 	pre = ' ' * parser.depth
 	parser.src += [pre + s]
 
+def splice(parser, lines):
+	flush(parser)
+	pre = ' ' * parser.depth
+	parser.src += [pre + l for l in lines] or [pre + 'pass']
+
 def close(obj):
 	obj.detab()
 	obj.close()
@@ -264,6 +595,7 @@ def p_haml_doc(p):
 			| doc LF'''
 	while len(p.parser.to_close) > 0:
 		close(p.parser.to_close.pop())
+	flush(p.parser)
 
 def p_doc(p):
 	'doc : obj'
@@ -288,9 +620,26 @@ def p_obj(p):
 		| silentscript'''
 	p[0] = p[1]
 
+directive_re = re.compile(r'@(include|extends|block|cache)\s+(.*)$')
+
+def directive(parser, name, arg):
+	if name == 'cache':
+		return Fragment(parser, arg.strip().rstrip(':'))
+	arg = arg.strip().strip('\'"')
+	if name == 'include':
+		return Include(parser, arg)
+	elif name == 'extends':
+		return Extends(parser, arg)
+	elif name == 'block':
+		return Block(parser, arg)
+
 def p_silentscript(p):
 	'''silentscript : SILENTSCRIPT'''
-	p[0] = SilentScript(p.parser, value=p[1])
+	m = directive_re.match(p[1])
+	if m:
+		p[0] = directive(p.parser, *m.groups())
+	else:
+		p[0] = SilentScript(p.parser, value=p[1])
 
 def p_script(p):
 	'''script : TYPE SCRIPT'''
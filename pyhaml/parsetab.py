@@ -0,0 +1,69 @@
+
+# pyhaml/parsetab.py
+# This file is automatically generated. Do not edit.
+_tabversion = '3.2'
+
+_lr_method = 'LALR'
+
+_lr_signature = b'\x03A\x11~\xcf\xa7\xc0\xf8EG%\x9d\xc7w&G'
+    
+_lr_action_items = {'$end':([0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[-1,0,-2,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,-3,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'COMMENT':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[13,13,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,13,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'CONDCOMMENT':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[15,15,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,15,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'DOCTYPE':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[16,16,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,16,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'TYPE':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[17,17,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,17,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,17,-26,-24,-30,-31,]),'SILENTSCRIPT':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[18,18,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,18,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'TAGNAME':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[19,19,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,19,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'ID':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[20,20,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,33,-37,-38,20,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'CLASSNAME':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[21,21,-4,-7,-8,-9,-10,-11,-12,-13,25,-16,-22,-33,-20,-17,-14,-36,-37,-38,21,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'VALUE':([0,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[14,14,-4,-7,-8,-9,-10,-11,-12,-13,-27,27,28,-33,29,-17,-14,-36,-37,-38,14,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,14,-26,-24,27,-31,]),'LF':([2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,18,19,20,21,23,24,25,26,27,28,29,30,31,32,33,34,35,36,37,38,39,40,41,],[22,-4,-7,-8,-9,-10,-11,-12,-13,-27,-16,-22,-33,-20,-17,-14,-36,-37,-38,-5,-34,-40,-28,-32,-23,-21,-18,-19,-15,-39,-6,-25,-35,-29,-26,-24,-30,-31,]),'DICT':([11,19,20,21,24,25,26,33,],[-27,-36,-37,-38,36,-40,-28,-39,]),'/':([11,19,20,21,24,25,26,33,35,36,],[-27,-36,-37,-38,-34,-40,-28,-39,38,-35,]),'TRIM':([11,19,20,21,25,33,],[26,-36,-37,-38,-40,-39,]),'HTMLTYPE':([16,],[30,]),'XMLTYPE':([16,],[31,]),'SCRIPT':([17,],[32,]),}
+
+_lr_action = { }
+for _k, _v in _lr_action_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+      if not _x in _lr_action:  _lr_action[_x] = { }
+      _lr_action[_x][_k] = _y
+del _lr_action_items
+
+_lr_goto_items = {'haml':([0,],[1,]),'doc':([0,],[2,]),'obj':([0,2,22,],[3,23,34,]),'element':([0,2,22,],[4,4,4,]),'content':([0,2,22,],[5,5,5,]),'comment':([0,2,22,],[6,6,6,]),'condcomment':([0,2,22,],[7,7,7,]),'doctype':([0,2,22,],[8,8,8,]),'script':([0,2,22,37,],[9,9,9,41,]),'silentscript':([0,2,22,],[10,10,10,]),'tag':([0,2,22,],[11,11,11,]),'value':([0,2,22,37,],[12,12,12,40,]),'trim':([11,],[24,]),'dict':([24,],[35,]),'selfclose':([35,],[37,]),'text':([37,],[39,]),}
+
+_lr_goto = { }
+for _k, _v in _lr_goto_items.items():
+   for _x,_y in zip(_v[0],_v[1]):
+       if not _x in _lr_goto: _lr_goto[_x] = { }
+       _lr_goto[_x][_k] = _y
+del _lr_goto_items
+_lr_productions = [
+  ("S' -> haml","S'",1,None,None,None),
+  ('haml -> <empty>','haml',0,'p_haml_doc','pyhaml/parser.py',593),
+  ('haml -> doc','haml',1,'p_haml_doc','pyhaml/parser.py',594),
+  ('haml -> doc LF','haml',2,'p_haml_doc','pyhaml/parser.py',595),
+  ('doc -> obj','doc',1,'p_doc','pyhaml/parser.py',601),
+  ('doc -> doc obj','doc',2,'p_doc_obj','pyhaml/parser.py',606),
+  ('doc -> doc LF obj','doc',3,'p_doc_indent_obj','pyhaml/parser.py',610),
+  ('obj -> element','obj',1,'p_obj','pyhaml/parser.py',614),
+  ('obj -> content','obj',1,'p_obj','pyhaml/parser.py',615),
+  ('obj -> comment','obj',1,'p_obj','pyhaml/parser.py',616),
+  ('obj -> condcomment','obj',1,'p_obj','pyhaml/parser.py',617),
+  ('obj -> doctype','obj',1,'p_obj','pyhaml/parser.py',618),
+  ('obj -> script','obj',1,'p_obj','pyhaml/parser.py',619),
+  ('obj -> silentscript','obj',1,'p_obj','pyhaml/parser.py',620),
+  ('silentscript -> SILENTSCRIPT','silentscript',1,'p_silentscript','pyhaml/parser.py',637),
+  ('script -> TYPE SCRIPT','script',2,'p_script','pyhaml/parser.py',645),
+  ('content -> value','content',1,'p_content','pyhaml/parser.py',649),
+  ('doctype -> DOCTYPE','doctype',1,'p_doctype','pyhaml/parser.py',653),
+  ('doctype -> DOCTYPE HTMLTYPE','doctype',2,'p_htmltype','pyhaml/parser.py',657),
+  ('doctype -> DOCTYPE XMLTYPE','doctype',2,'p_xmltype','pyhaml/parser.py',662),
+  ('condcomment -> CONDCOMMENT','condcomment',1,'p_condcomment','pyhaml/parser.py',670),
+  ('condcomment -> CONDCOMMENT VALUE','condcomment',2,'p_condcomment','pyhaml/parser.py',671),
+  ('comment -> COMMENT','comment',1,'p_comment','pyhaml/parser.py',677),
+  ('comment -> COMMENT VALUE','comment',2,'p_comment','pyhaml/parser.py',678),
+  ('element -> tag trim dict selfclose text','element',5,'p_element_tag_trim_dict_value','pyhaml/parser.py',684),
+  ('selfclose -> <empty>','selfclose',0,'p_selfclose','pyhaml/parser.py',693),
+  ('selfclose -> /','selfclose',1,'p_selfclose','pyhaml/parser.py',694),
+  ('trim -> <empty>','trim',0,'p_trim','pyhaml/parser.py',698),
+  ('trim -> TRIM','trim',1,'p_trim','pyhaml/parser.py',699),
+  ('text -> <empty>','text',0,'p_text','pyhaml/parser.py',706),
+  ('text -> value','text',1,'p_text','pyhaml/parser.py',707),
+  ('text -> script','text',1,'p_text','pyhaml/parser.py',708),
+  ('value -> value VALUE','value',2,'p_value','pyhaml/parser.py',715),
+  ('value -> VALUE','value',1,'p_value','pyhaml/parser.py',716),
+  ('dict -> <empty>','dict',0,'p_dict','pyhaml/parser.py',723),
+  ('dict -> DICT','dict',1,'p_dict','pyhaml/parser.py',724),
+  ('tag -> TAGNAME','tag',1,'p_tag_tagname','pyhaml/parser.py',731),
+  ('tag -> ID','tag',1,'p_tag_id','pyhaml/parser.py',735),
+  ('tag -> CLASSNAME','tag',1,'p_tag_class','pyhaml/parser.py',739),
+  ('tag -> TAGNAME ID','tag',2,'p_tag_tagname_id','pyhaml/parser.py',743),
+  ('tag -> tag CLASSNAME','tag',2,'p_tag_tag_class','pyhaml/parser.py',747),
+]
@@ -1,27 +1,27 @@
 from __future__ import division
 
 import sys
-import tokenize
 
 if sys.version_info[0] >= 3:
 	import io
+	import builtins
 	from .patch3 import ex
 	
 	raw_input = input
 	StringIO = io.StringIO
-	
-	def toks(s):
-		g = io.BytesIO(bytes(s.encode())).readline
-		return (t for t in tokenize.tokenize(g))
-	
-	def untokenize(toks):
-		return tokenize.untokenize(toks).decode()
+	strings = (str,)
+	integers = (int,)
 else:
+	import __builtin__ as builtins
 	from .patch2 import ex
 	from StringIO import StringIO
-	
-	def toks(s):
-		return tokenize.generate_tokens(StringIO(s).readline)
-	
-	def untokenize(toks):
-		return tokenize.untokenize(toks)
+	strings = (str, unicode)
+	integers = (int, long)
+
+def toks(readline):
+	import tokenize
+	return tokenize.generate_tokens(readline)
+
+def untokenize(toks):
+	import tokenize
+	return tokenize.untokenize(toks)
@@ -2808,7 +2808,9 @@ class ParserReflect(object):
                 sig.update(" ".join(self.tokens).encode('latin-1'))
             for f in self.pfuncs:
                 if f[3]:
-                    sig.update(f[3].encode('latin-1'))
+                    # strip indentation so the signature doesn't change with docstring dedenting (3.13)
+                    doc = "\n".join([l.strip() for l in f[3].splitlines()])
+                    sig.update(doc.encode('latin-1'))
         except (TypeError,ValueError):
             pass
         return sig.digest()
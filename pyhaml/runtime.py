@@ -0,0 +1,41 @@
+from .patch import strings
+
+class Markup(str):
+	
+	def __html__(self):
+		return self
+
+def escape(s):
+	if hasattr(s, '__html__'):
+		return s.__html__()
+	if not isinstance(s, strings):
+		s = str(s)
+	return s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+def join(sep, v):
+	if not isinstance(v, (list, tuple)):
+		return v
+	items = []
+	for x in v:
+		x = join(sep, x)
+		if x is not None and x is not False and x != '':
+			items.append(x if isinstance(x, strings) else str(x))
+	return sep.join(items) or None
+
+def attrs(d, static, xhtml=False):
+	merged = dict(d)
+	for k, v in static.items():
+		merged[k] = [v, merged[k]] if k in merged else v
+	s = []
+	for k, v in merged.items():
+		if k == 'class':
+			v = join(' ', v)
+		elif k == 'id':
+			v = join('_', v)
+		if v is None or v is False:
+			continue
+		if v is True:
+			s.append(' %s="%s"' % (k, k) if xhtml else ' ' + k)
+		else:
+			s.append(' %s="%s"' % (k, escape(v)))
+	return ''.join(s)
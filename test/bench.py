@@ -0,0 +1,101 @@
+import os
+import sys
+import timeit
+
+dir = os.path.dirname(__file__)
+sys.path.insert(0, os.path.dirname(dir))
+
+from pyhaml import lexer, lextab, parser
+from pyhaml.ply import lex, yacc
+from pyhaml.patch import ex
+from pyhaml.haml import engine, render_context
+
+def report(name, t, n):
+	sys.stdout.write('%-40s %10.3f ms\n' % (name, t * 1000.0 / n))
+
+def bench_startup(n=20):
+	def build():
+		yacc.yacc(module=parser, tabmodule='nonexistent_parsetab',
+			write_tables=False, debug=False)
+	def load():
+		yacc.yacc(module=parser, tabmodule='pyhaml.parsetab',
+			write_tables=False, debug=False)
+	report('parse tables (generated)', timeit.timeit(build, number=n), n)
+	report('parse tables (pyhaml.parsetab)', timeit.timeit(load, number=n), n)
+	report('lexer (validated)',
+		timeit.timeit(lambda: lex.lex(module=lexer), number=n), n)
+	report('lexer (pyhaml.lextab)',
+		timeit.timeit(lambda: lex.lex(module=lexer, optimize=1, lextab=lextab), number=n), n)
+	report('engine()', timeit.timeit(engine, number=n), n)
+
+def bench_compile(n=3):
+	en = engine()
+	en.setops()
+	block = "%div{'class': 'row'}\n  %p= x\n  - y = x + 1\n  %a{'href': y} link\n"
+	for size in (500, 2000, 8000, 16000):
+		s = block * (size // 4)
+		t = timeit.timeit(lambda: en.compile(s), number=n)
+		report('compile %d lines' % size, t, n)
+		report('  per line', t, n * size)
+
+page = '''
+!!!
+%html
+  %head
+    %title= title
+  %body
+    %ul#items
+      - for item in items:
+        %li.item
+          %a{'href': item['href']}= item['name']
+          %span.price= item['price']
+'''
+
+def context():
+	items = [{'href': '/item/%d' % i, 'name': 'item %d' % i, 'price': i * 3}
+		for i in range(100)]
+	return {'title': 'items', 'items': items}
+
+def bench_render(n=200):
+	en = engine()
+	ctx = context()
+	t = en.compile_template(page)
+	op = en.setops()
+	code = en.build(page.strip(), 'module')
+	def run_exec():
+		ex(code, render_context(en, op, ctx).globals, {})
+	report('render (module exec)', timeit.timeit(run_exec, number=n), n)
+	report('render (function)', timeit.timeit(lambda: t.render(ctx), number=n), n)
+
+escapes = '''
+%table
+  - for row in rows:
+    %tr
+      %td&= row['name']
+      %td&= row['note']
+      %td&= row['id']
+'''
+
+def bench_escape(n=200):
+	from pyhaml import runtime
+	rows = [{'name': 'item <%d>' % i, 'note': '"a" & "b"', 'id': i} for i in range(100)]
+	s = runtime.text('cheese & <crackers> "x"' * 4)
+	table = dict((ord(c), e) for c, e in (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;')))
+	m = n * 100
+	report('escape (str.translate)', timeit.timeit(lambda: s.translate(table), number=m), m)
+	report('escape (runtime.escape)', timeit.timeit(lambda: runtime.escape(s), number=m), m)
+	t = engine().compile_template(escapes)
+	report('render (escape-heavy)', timeit.timeit(lambda: t.render({'rows': rows}), number=n), n)
+
+benchmarks = [
+	bench_startup,
+	bench_compile,
+	bench_render,
+	bench_escape,
+]
+
+if __name__ == '__main__':
+	names = sys.argv[1:]
+	for b in benchmarks:
+		if not names or b.__name__[len('bench_'):] in names:
+			b()
@@ -1,19 +1,54 @@
 import os
 import sys
+import shutil
 import difflib
+import threading
+import subprocess
+import tempfile
 import unittest
 from functools import partial
 
 dir = os.path.dirname(__file__)
 sys.path.insert(0, os.path.dirname(dir))
 
+from pyhaml import lexer, parser, lextab, parsetab, cache
+from pyhaml.ply import yacc
 from pyhaml.patch import StringIO
-from pyhaml.haml import to_html, render, engine
+from pyhaml.haml import to_html, render, compile_template, stream, engine
+from pyhaml.haml import to_html_into, render_to
+import pyhaml.haml
 
 doctypes = engine.doctypes
 
+class counting_engine(engine):
+	
+	def __init__(self, *args, **kwargs):
+		engine.__init__(self, *args, **kwargs)
+		self.builds = 0
+	
+	def build(self, *args):
+		self.builds += 1
+		return engine.build(self, *args)
+
 class TestHaml(unittest.TestCase):
 	
+	def setUp(self):
+		self.tmp = tempfile.mkdtemp()
+	
+	def tearDown(self):
+		shutil.rmtree(self.tmp)
+	
+	def write(self, name, s, mtime=None):
+		path = os.path.join(self.tmp, name)
+		f = open(path, 'w')
+		try:
+			f.write(s)
+		finally:
+			f.close()
+		if mtime is not None:
+			os.utime(path, (mtime, mtime))
+		return path
+	
 	def diff(self, s, *args):
 		p = os.path.join(dir, 'haml/%s.haml' % s)
 		s1 = render(p, *args)
@@ -109,8 +144,9 @@ class TestHaml(unittest.TestCase):
 		self.assertEqual('<p>multiline</p>\n', to_html("%p=('multi'\n'line')"))
 	
 	def testescapeattrs(self):
-		self.assertEqual('<img src="foo.com?bar&baz=&quot;&quot;"/>\n', to_html("%img{'src':'foo.com?bar&baz=\"\"'}"))
-		self.assertEqual('<img foo="bar&baz"/>\n', to_html("%img{'foo':'bar&baz'}"))
+		self.assertEqual('<img src="foo.com?bar&amp;baz=&quot;&quot;"/>\n', to_html("%img{'src':'foo.com?bar&baz=\"\"'}"))
+		self.assertEqual('<img foo="bar&amp;baz"/>\n', to_html("%img{'foo':'bar&baz'}"))
+		self.assertEqual('<img foo="&lt;b&gt;"/>\n', to_html("%img{'foo': x}", {'x': '<b>'}))
 		self.assertEqual('<p foo="&quot;bar&quot;"></p>\n', to_html("%p{'foo':'\"bar\"'}"))
 	
 	def testsilent(self):
@@ -155,6 +191,42 @@ class TestHaml(unittest.TestCase):
 		self.assertEqual('foo &gt; bar\n', to_html("= 'foo > bar'", escape=True))
 		self.assertEqual('foo < bar\n', to_html("= 'foo < bar'", escape=False))
 	
+	def testmergeattrs(self):
+		self.assertEqual('<p class="a b c"></p>\n', to_html("%p.a.b{'class': 'c'}"))
+		self.assertEqual('<p class="a c d"></p>\n', to_html("%p.a{'class': x}", {'x': ['c', None, 'd']}))
+		self.assertEqual('<p class="a"></p>\n', to_html("%p.a{'class': x}", {'x': None}))
+		self.assertEqual('<p id="a_b"></p>\n', to_html("%p#a{'id': x}", {'x': 'b'}))
+		self.assertEqual('<p id="a_1_2"></p>\n', to_html("%p#a{'id': ['1', 2]}"))
+	
+	def testbooleanattrs(self):
+		html = "%input{'checked': True, 'disabled': False, 'value': None, 'name': n}"
+		self.assertEqual('<input checked name="x"/>\n', to_html(html, {'n': 'x'}))
+		self.assertEqual('<input checked="checked" name="x"/>\n', to_html(html, {'n': 'x'}, format='xhtml'))
+		self.assertEqual('<input checked/>\n', to_html("%input{'checked': True}"))
+		en = engine()
+		en.setops()
+		src = en.compile("%div\n  %p{'a': x} text")
+		self.assertEqual(1, src.count('__attrs__'))
+		self.assertEqual(0, src.count('__indent__'))
+		self.assertEqual(1, src.count('__depth__'))
+		self.assertEqual(2, src.count('__write__'))
+	
+	def testattrsnonascii(self):
+		v = 'caf\xc3\xa9'
+		html = '<p class="a caf\xc3\xa9" title="caf\xc3\xa9"></p>\n'
+		self.assertEqual(html, to_html("%p.a{'class': x, 'title': x}", {'x': v}))
+		self.assertEqual(html, to_html("%%p.a{'class': '%s', 'title': '%s'}" % (v, v)))
+	
+	def testmarkup(self):
+		from pyhaml.haml import Markup
+		self.assertEqual('<b>x</b>\n', to_html("&= m", {'m': Markup('<b>x</b>')}))
+		self.assertEqual('<b>x</b>\n', to_html("= m", {'m': Markup('<b>x</b>')}, escape=True))
+		self.assertEqual('&lt;b&gt;\n', to_html("= m", {'m': '<b>'}, escape=True))
+		self.assertEqual('&quot;5&quot;\n', to_html("&= '\"5\"'"))
+		self.assertEqual('5\n', to_html("&= 5"))
+		self.assertEqual('caf\xc3\xa9 &amp;\n', to_html("&= x", {'x': 'caf\xc3\xa9 &'}))
+		self.assertEqual('caf\xc3\xa9\n', to_html("&= m", {'m': Markup('caf\xc3\xa9')}))
+	
 	def testnosanitize(self):
 		self.assertEqual('<&>\n', to_html("!='<&>'", escape=True))
 		self.assertEqual('<&>\n', to_html("!='<&>'", escape=False))
@@ -246,5 +318,478 @@ class TestHaml(unittest.TestCase):
 	def testimpdiff(self):
 		self.diff('imp', { 'bar': 'foo'})
 	
+	def testincludediff(self):
+		self.diff('inc')
+	
+	def testincludecompile(self):
+		en = engine()
+		en.setops(path=os.path.join(dir, 'haml/inc.haml'))
+		src = en.compile('- def f():\n  -@include item\n- f()')
+		self.assertTrue('import' not in src)
+		self.assertTrue(' for i in range(2):' in src)
+	
+	def testincluderecursive(self):
+		p = self.write('loop.haml', '%p\n  -@include loop')
+		self.assertRaises(Exception, engine().render, p)
+	
+	def testincludechange(self):
+		main = self.write('main.haml', '%div\n  -@include item')
+		self.write('item.haml', '%p= x')
+		en = counting_engine()
+		self.assertEqual('<div>\n  <p>1</p>\n</div>\n', en.render(main, {'x': 1}))
+		self.assertEqual('<div>\n  <p>2</p>\n</div>\n', en.render(main, {'x': 2}))
+		self.assertEqual(1, en.builds)
+		self.write('item.haml', '%a= x', mtime=0)
+		self.assertEqual('<div>\n  <a>3</a>\n</div>\n', en.render(main, {'x': 3}))
+		self.assertEqual(2, en.builds)
+	
+	def testextendsdiff(self):
+		self.diff('page', {'title': 'T'})
+	
+	def testextendsnesteddiff(self):
+		self.diff('subpage', {'title': 'S'})
+	
+	def testextendschange(self):
+		page = self.write('page.haml', '-@extends layout\n-@block body\n  %p= x')
+		layout = self.write('layout.haml', '%div\n  -@block body')
+		en = counting_engine()
+		self.assertEqual('<div>\n  <p>1</p>\n</div>\n', en.render(page, {'x': 1}))
+		self.assertEqual('<div>\n  <p>2</p>\n</div>\n', en.render(page, {'x': 2}))
+		self.assertEqual(1, en.builds)
+		self.write('layout.haml', '%span\n  -@block body', mtime=0)
+		self.assertEqual('<span>\n  <p>3</p>\n</span>\n', en.render(page, {'x': 3}))
+		self.assertEqual(2, en.builds)
+	
+	def testextendsstream(self):
+		page = self.write('page.haml', '-@extends layout\n-@block content\n  %p= x')
+		self.write('layout.haml', '- def body():\n  -@block content\n    %p default\n%div\n  - body()')
+		en = engine()
+		self.assertEqual('<div>\n  <p>1</p>\n</div>\n', en.render(page, {'x': 1}))
+		html = ''.join(en.stream(page, {'x': 1}, chunk_size=1))
+		self.assertEqual('<div>\n  <p>1</p>\n</div>\n', html)
+		self.write('layout.haml', '%div\n  -@cache "content"\n    -@block content')
+		en = engine()
+		html = ''.join(en.stream(page, {'x': 1}, chunk_size=1))
+		self.assertEqual('<div>\n  <p>1</p>\n</div>\n', html)
+		html = ''.join(en.stream(page, {'x': 2}, chunk_size=1))
+		self.assertEqual('<div>\n  <p>1</p>\n</div>\n', html)
+	
+	def testdepthgenerator(self):
+		s = '- def gen():\n  %p a\n  - yield 0\n- g = gen()\n%div\n  %ul\n    - for i in g:\n      %p= i'
+		self.assertEqual('<div>\n  <ul>\n    <p>a</p>\n    <p>0</p>\n  </ul>\n</div>\n', to_html(s))
+	
+	def testdepthdecorator(self):
+		s = '- import functools\n-@functools.wraps(len)\n- def f():\n  - return 1\n= f()'
+		self.assertEqual('1\n', to_html(s))
+		s = '%div\n  - import functools\n  -@functools.wraps(len)\n  - def f():\n    - return 1\n  = f()'
+		self.assertEqual('<div>\n  1\n</div>\n', to_html(s))
+	
+	def testdepthloop(self):
+		en = engine()
+		en.setops()
+		src = en.compile('%ul\n  - for i in items:\n    - y = i*2\n    - z = y\n    %li= z')
+		self.assertEqual(1, src.count('__depth__'))
+		s = '- def f():\n  %b x\n%div\n  - for i in range(2):\n    - f()\n    %p\n      - f()'
+		html = '<div>\n' + '  <b>x</b>\n  <p>\n    <b>x</b>\n  </p>\n' * 2 + '</div>\n'
+		self.assertEqual(html, to_html(s))
+	
+	def testfragment(self):
+		en = engine()
+		t = en.compile_template('%div\n  -@cache "side", ttl=60\n    %p= calls.append(x) or x\n  %p= x')
+		calls = []
+		self.assertEqual('<div>\n  <p>1</p>\n  <p>1</p>\n</div>\n', t.render({'x': 1, 'calls': calls}))
+		self.assertEqual('<div>\n  <p>1</p>\n  <p>2</p>\n</div>\n', t.render({'x': 2, 'calls': calls}))
+		self.assertEqual([1], calls)
+		html = ''.join(t.stream({'x': 3, 'calls': calls}, chunk_size=1))
+		self.assertEqual('<div>\n  <p>1</p>\n  <p>3</p>\n</div>\n', html)
+		t = en.compile_template('-@cache key, ttl=-1:\n  %p= x')
+		self.assertEqual('<p>1</p>\n', t.render({'key': 'k', 'x': 1}))
+		self.assertEqual('<p>2</p>\n', t.render({'key': 'k', 'x': 2}))
+	
+	def testfragmentoptions(self):
+		en = engine()
+		t = '-@cache "k"\n  %input{"checked": c}'
+		self.assertEqual('<input checked/>\n', en.to_html(t, {'c': True}))
+		self.assertEqual('<input checked="checked"/>\n', en.to_html(t, {'c': True}, format='xhtml'))
+		t = '-@cache "e"\n  = x'
+		self.assertEqual('&lt;\n', en.to_html(t, {'x': '<'}, escape=True))
+		self.assertEqual('<\n', en.to_html(t, {'x': '<'}))
+	
+	def testfragmentfile(self):
+		en = engine(fragments=cache.FileCache(self.tmp))
+		t = en.compile_template('-@cache "nav"\n  %p= x')
+		self.assertEqual('<p>1</p>\n', t.render({'x': 1}))
+		en = engine(fragments=cache.FileCache(self.tmp))
+		t = en.compile_template('-@cache "nav"\n  %p= x')
+		self.assertEqual('<p>1</p>\n', t.render({'x': 2}))
+		en.fragments.clear()
+		self.assertEqual('<p>3</p>\n', t.render({'x': 3}))
+	
+	def testautoreload(self):
+		main = self.write('main.haml', '-@include item')
+		self.write('item.haml', '%p= x')
+		slow = engine(auto_reload=True, check_interval=3600)
+		fast = engine(auto_reload=True, check_interval=0)
+		for en in (slow, fast):
+			self.assertEqual('<p>1</p>\n', en.render(main, {'x': 1}))
+			self.assertTrue(en.load_template(main) is en.load_template(main))
+		self.write('item.haml', '%a= x', mtime=0)
+		self.assertEqual('<p>2</p>\n', slow.render(main, {'x': 2}))
+		self.assertEqual('<a>2</a>\n', fast.render(main, {'x': 2}))
+	
+	def testugly(self):
+		en = engine()
+		for name, ctx in (('basic', {}), ('func', {}), ('ext', {'bar': 'foo'}),
+				('imp', {'bar': 'foo'}), ('inc', {}), ('page', {'title': 'T'})):
+			p = os.path.join(dir, 'haml/%s.haml' % name)
+			html = en.render(p, ctx)
+			ugly = en.render(p, ctx, ugly=True)
+			self.assertEqual('\n'.join(l.strip() for l in html.splitlines()) + '\n', ugly)
+		en.setops(ugly=True)
+		src = en.compile('%div\n  %p\n    %a= x')
+		self.assertFalse('__indent__' in src)
+		self.assertFalse('__entab__' in src)
+		self.assertFalse('__detab__' in src)
+	
+	def testimportscope(self):
+		en = engine()
+		path = os.path.join(dir, 'haml/ext.haml')
+		seen = []
+		class finder(object):
+			def find_module(self, fullname, path=None):
+				seen.append(fullname)
+				return None
+		hooks = list(sys.meta_path)
+		sys.meta_path.insert(0, finder())
+		try:
+			self.assertEqual('<a>foo</a>\n', en.render(path, {'bar': 'foo'}))
+			self.assertEqual('<a>baz</a>\n', en.render(path, {'bar': 'baz'}))
+		finally:
+			del sys.meta_path[0]
+		self.assertEqual(hooks, sys.meta_path)
+		self.assertFalse('lib' in seen)
+		self.assertFalse('lib' in sys.modules)
+		self.assertEqual(os.path.join(dir, 'haml', 'lib.haml'),
+			en.index.find('lib', [os.path.dirname(path)]))
+	
+	def testcache(self):
+		en = engine(cache_size=2)
+		self.assertEqual('<p>foo</p>\n', en.to_html('%p foo'))
+		self.assertEqual('<p>foo</p>\n', en.to_html('%p foo'))
+		self.assertEqual(1, en.cache.hits)
+		self.assertEqual(1, en.cache.misses)
+		self.assertEqual('<p>3</p>\n', en.to_html('%p= x', {'x': 3}))
+		self.assertEqual('<p>4</p>\n', en.to_html('%p= x', {'x': 4}))
+		self.assertEqual(2, en.cache.hits)
+	
+	def testcacheoptions(self):
+		en = engine()
+		self.assertEqual(doctypes['xhtml']['strict'] + '\n', en.to_html('!!! strict', format='xhtml'))
+		self.assertEqual(doctypes['html4']['strict'] + '\n', en.to_html('!!! strict', format='html4'))
+		self.assertEqual(0, en.cache.hits)
+		self.assertEqual(2, len(en.cache))
+	
+	def testtemplate(self):
+		t = compile_template('%p= x')
+		self.assertEqual('<p>1</p>\n', t.render({'x': 1}))
+		self.assertEqual('<p>2</p>\n', t.render({'x': 2}))
+		self.assertEqual('', compile_template('').render())
+	
+	def testtemplateoptions(self):
+		t = compile_template('!!!', format='xhtml')
+		to_html('!!!', format='html4')
+		self.assertEqual(doctypes['xhtml'][''] + '\n', t.render())
+	
+	def testtemplatecompileonce(self):
+		en = engine()
+		t = en.compile_template('%p= x')
+		for i in range(3):
+			t.render({'x': i})
+		self.assertEqual(1, en.cache.misses)
+		self.assertEqual(0, en.cache.hits)
+	
+	def testdiskcache(self):
+		p = self.write('foo.haml', '%p= x')
+		en = counting_engine()
+		self.assertEqual('<p>1</p>\n', en.render(p, {'x': 1}, cache=True))
+		self.assertEqual(1, en.builds)
+		self.assertEqual(1, len(os.listdir(os.path.join(self.tmp, '__hamlcache__'))))
+		en = counting_engine()
+		self.assertEqual('<p>2</p>\n', en.render(p, {'x': 2}, cache=True))
+		self.assertEqual(0, en.builds)
+		self.write('foo.haml', '%a= x', mtime=0)
+		en = counting_engine()
+		self.assertEqual('<a>3</a>\n', en.render(p, {'x': 3}, cache=True))
+		self.assertEqual(1, en.builds)
+	
+	def testdiskcachecodegen(self):
+		p = self.write('foo.haml', "%p{'a': x} hi")
+		counting_engine().render(p, {'x': 1}, cache=True)
+		codegen = parser.codegen
+		parser.codegen += 1
+		try:
+			en = counting_engine()
+			self.assertEqual('<p a="2">hi</p>\n', en.render(p, {'x': 2}, cache=True))
+			self.assertEqual(1, en.builds)
+		finally:
+			parser.codegen = codegen
+	
+	def testpartialcache(self):
+		main = self.write('main.haml', "- import lib\n- lib.foo()\n- assert __imp__('lib') is lib")
+		self.write('lib.haml', '- def foo():\n  %a= x')
+		en = counting_engine()
+		self.assertEqual('<a>1</a>\n', en.render(main, {'x': 1}))
+		self.assertEqual('<a>2</a>\n', en.render(main, {'x': 2}))
+		self.assertEqual(2, en.builds)
+		self.assertEqual(1, en.partials.info()['hits'])
+		self.write('lib.haml', '- def foo():\n  %p= x', mtime=0)
+		self.assertEqual('<p>3</p>\n', en.render(main, {'x': 3}))
+		self.assertEqual(3, en.builds)
+		self.assertEqual(1, len(en.partials))
+	
+	def testinclude(self):
+		main = self.write('main.haml', '- import lib\n- lib.foo()')
+		en = engine()
+		html = en.render(main, {'bar': 'foo'}, include=[os.path.join(dir, 'haml')])
+		self.assertEqual('<a>foo</a>\n', html)
+		self.assertRaises(ImportError, en.render, main)
+	
+	def testindexrefresh(self):
+		en = engine(check_interval=3600)
+		self.assertEqual(None, en.index.find('foo', [self.tmp]))
+		p = self.write('foo.haml', '')
+		self.assertEqual(None, en.index.find('foo', [self.tmp]))
+		en.refresh()
+		self.assertEqual(p, en.index.find('foo', [self.tmp]))
+		en = engine(check_interval=0)
+		self.assertEqual(p, en.index.find('foo', [self.tmp]))
+		os.remove(p)
+		os.utime(self.tmp, (0, 0))
+		self.assertEqual(None, en.index.find('foo', [self.tmp]))
+	
+	def testdiskcachedir(self):
+		en = counting_engine()
+		p = os.path.join(dir, 'haml/basic.haml')
+		en.render(p, cache_dir=self.tmp)
+		en.render(p, cache_dir=self.tmp, format='xhtml')
+		self.assertEqual(2, len(os.listdir(self.tmp)))
+		en = counting_engine()
+		en.render(p, cache_dir=self.tmp)
+		self.assertEqual(0, en.builds)
+	
+	def testparsetab(self):
+		pinfo = yacc.ParserReflect(dict(parser.__dict__))
+		pinfo.get_all()
+		self.assertEqual(pinfo.signature(), parsetab._lr_signature,
+			'pyhaml/parsetab.py is stale, run make tables')
+		for p in parsetab._lr_productions[1:]:
+			self.assertFalse(os.path.isabs(p[4]))
+	
+	def testfoldliterals(self):
+		en = engine()
+		en.setops()
+		src = en.compile('%p\n  %a foo\n  %b bar\n  %img')
+		self.assertEqual(0, src.count('__entab__()') - src.count('__detab__()'))
+		self.assertTrue("__write__('\\n<p>\\n  <a>foo</a>\\n  <b>bar</b>\\n  <img/>\\n</p>')" in src)
+		self.assertEqual('<p>\n  <a>foo</a>\n  <b>bar</b>\n  <img/>\n</p>\n', en.to_html('%p\n  %a foo\n  %b bar\n  %img'))
+		src = en.compile('%img\n%img>\n%img')
+		self.assertTrue("__write__('\\n<img/><img/><img/>')" in src)
+	
+	def teststaticdepth(self):
+		en = engine()
+		en.setops()
+		src = en.compile('%div\n  %ul\n    - for i in x:\n      %li= i')
+		self.assertFalse('__indent__' in src)
+		self.assertFalse('__entab__' in src)
+		self.assertTrue("'\\n    <li>'" in src)
+		src = en.compile('- def f():\n  %p\n    %a x')
+		self.assertTrue('__indent__' in src)
+		self.assertTrue('__entab__' in src)
+	
+	def testdynamicdepth(self):
+		haml = '- def f():\n  %p x\n%div\n  - f()\n  %ul\n    - f()\n  - if c:\n    %span\n      - f()\n  - f()\n- f()'
+		html = '<div>\n  <p>x</p>\n  <ul>\n    <p>x</p>\n  </ul>\n  <span>\n    <p>x</p>\n  </span>\n  <p>x</p>\n</div>\n<p>x</p>\n'
+		self.assertEqual(html, to_html(haml, {'c': True}))
+	
+	def testfoldblocks(self):
+		html = '<ul>\n  <li>0</li>\n  <li>1</li>\n</ul>\n<p></p>\n'
+		self.assertEqual(html, to_html('%ul\n  - for i in range(2):\n    %li= i\n%p'))
+		html = '<ul>\n  <li>a</li>\n</ul>\n'
+		self.assertEqual(html, to_html('%ul\n  - if True:\n    %li a\n  - else:\n    %li b'))
+	
+	def teststaticattrs(self):
+		en = engine()
+		en.setops()
+		src = en.compile("%p#foo.bar{'a': 'b', 'c': 1}")
+		self.assertFalse('__attrs__' in src)
+		self.assertTrue('<p a="b" c="1" id="foo" class="bar"></p>' in src)
+		src = en.compile("%input{'checked': True, 'value': None, 'v': -1}")
+		self.assertFalse('__attrs__' in src)
+		self.assertTrue('<input checked v="-1"/>' in src)
+		src = en.compile("%p{'a': b}")
+		self.assertTrue('__attrs__' in src)
+	
+	def testconstantfold(self):
+		en = engine()
+		en.setops()
+		src = en.compile("%p= 'static'\n= 60*60\n%a{'href': '/' + 'home', 'n': 2**3} x")
+		self.assertEqual(1, src.count('__write__'))
+		self.assertFalse('__attrs__' in src)
+		self.assertTrue('<p>static</p>\\n3600\\n<a href="/home" n="8">x</a>' in src)
+		en.setops(escape=True)
+		src = en.compile("%p= '<b>' + 'x'")
+		self.assertTrue('&lt;b&gt;x' in src)
+		self.assertFalse('__escape__' in src)
+		for code in ("'a' * 100000", "2 ** 100000", "'%099999d' % 1", "1 / 0", "x + 1", "f()"):
+			self.assertTrue('__escape__(' in en.compile('= ' + code), code)
+		self.assertRaises(ZeroDivisionError, to_html, '= 1 / 0')
+		self.assertEqual('0.5\n', to_html('= 1 / 2'))
+	
+	def testfunctionlocals(self):
+		self.assertEqual('<p>2</p>\n', to_html("-x += 1\n%p= x", {'x': 1}))
+		self.assertEqual('<p>1</p>\n<p>1</p>\n', to_html("%p= x\n-x = x\n%p= x", {'x': 1}))
+		self.assertRaises(NameError, partial(to_html, "-x += 1"))
+	
+	def testfunctionglobal(self):
+		haml = '- count = 0\n- def inc():\n  - global count\n  - count += 1\n- inc()\n= count'
+		self.assertEqual('1\n', to_html(haml))
+		self.assertEqual('1\n', ''.join(stream(haml)))
+		src = engine().function(['global foo', 'foo = 1'])
+		self.assertFalse('__ctx__[' in src)
+		self.assertEqual('1\n', to_html('- global foo\n- foo = 1\n= foo', {'foo': 2}))
+	
+	def testfunctionstarimport(self):
+		self.assertEqual('a/b\n', to_html("- from posixpath import *\n= join('a', 'b')"))
+		self.assertEqual('a/b\n', ''.join(stream("- from posixpath import *\n= join('a', 'b')")))
+		p = self.write('main.haml', '- from lib import *\n- foo()')
+		html = render(p, {'bar': 'foo'}, include=[os.path.join(dir, 'haml')])
+		self.assertEqual('<a>foo</a>\n', html)
+	
+	def testfunctionclosure(self):
+		haml = "-def a():\n  %p a\n-def b():\n  -a()\n-b()"
+		self.assertEqual('<p>a</p>\n', to_html(haml))
+	
+	def teststream(self):
+		for name in ('basic', 'func'):
+			p = os.path.join(dir, 'haml/%s.haml' % name)
+			chunks = list(stream(p, chunk_size=16))
+			self.assertEqual(render(p), ''.join(chunks))
+		chunks = list(stream('- for i in range(20):\n  %p= i', chunk_size=16))
+		self.assertTrue(len(chunks) > 2)
+		self.assertEqual(to_html('- for i in range(20):\n  %p= i'), ''.join(chunks))
+		self.assertEqual('<p>1</p>\n', ''.join(stream('%p= x', {'x': 1})))
+		self.assertEqual('\n', ''.join(stream('-x = 1')))
+		self.assertEqual('', ''.join(stream('')))
+		s = '- import functools\n-@functools.wraps(len)\n-@functools.wraps(abs)\n- def f():\n  - return 1\n= f()'
+		self.assertEqual('1\n', ''.join(stream(s, chunk_size=1)))
+		s = '- def deco(f):\n  - return f\n%div\n  -@deco\n  - class C:\n    - x = 2\n  = C.x'
+		self.assertEqual(to_html(s), ''.join(stream(s, chunk_size=1)))
+	
+	def teststreamlazy(self):
+		seen = []
+		def item(i):
+			seen.append(i)
+			return i
+		haml = '%ul\n  - for i in range(100):\n    %li= item(i)'
+		html = to_html(haml, {'item': item})
+		del seen[:]
+		g = stream(haml, {'item': item}, chunk_size=64)
+		first = next(g)
+		self.assertTrue(first.startswith('<ul>'))
+		self.assertTrue(len(seen) < 100)
+		self.assertEqual(html, first + ''.join(g))
+	
+	def testrenderto(self):
+		p = os.path.join(dir, 'haml/basic.haml')
+		out = StringIO()
+		render_to(p, out, chunk_size=32)
+		self.assertEqual(render(p), out.getvalue())
+		out = StringIO()
+		to_html_into('%p= x', out, {'x': 'foo'})
+		self.assertEqual('<p>foo</p>\n', out.getvalue())
+	
+	def testdefaultengine(self):
+		old = pyhaml.haml.en
+		pyhaml.haml.en = None
+		try:
+			engines = []
+			def run():
+				engines.append(pyhaml.haml.default_engine())
+			threads = [threading.Thread(target=run) for i in range(8)]
+			for t in threads:
+				t.start()
+			for t in threads:
+				t.join()
+			self.assertEqual(8, len(engines))
+			self.assertEqual(1, len(set(id(e) for e in engines)))
+		finally:
+			pyhaml.haml.en = old
+	
+	def testthreads(self):
+		en = engine()
+		imp = os.path.join(dir, 'haml/imp.haml')
+		ext = os.path.join(dir, 'haml/ext.haml')
+		func = os.path.join(dir, 'haml/func.haml')
+		expected = en.render(func)
+		errors = []
+		def run(i):
+			try:
+				for j in range(20):
+					bar = 'thread%d-%d' % (i, j)
+					for path in (imp, ext):
+						html = en.render(path, {'bar': bar})
+						if html != '<a>%s</a>\n' % bar:
+							errors.append(html)
+					html = en.render(func)
+					if html != expected:
+						errors.append(html)
+					html = ''.join(en.stream('%p= x\n' * 20, {'x': bar}, chunk_size=16))
+					if html != ('<p>%s</p>\n' % bar) * 20:
+						errors.append(html)
+			except Exception:
+				errors.append(sys.exc_info()[1])
+		interval = None
+		if hasattr(sys, 'setswitchinterval'):
+			interval = sys.getswitchinterval()
+			sys.setswitchinterval(1e-6)
+		try:
+			threads = [threading.Thread(target=run, args=(i,)) for i in range(32)]
+			for t in threads:
+				t.start()
+			for t in threads:
+				t.join()
+		finally:
+			if interval is not None:
+				sys.setswitchinterval(interval)
+		self.assertEqual([], errors)
+	
+	def testlextab(self):
+		self.assertEqual(lexer.signature(), lextab._lexsignature,
+			'pyhaml/lextab.py is stale, run make tables')
+		self.assertTrue(engine().lexer.lexoptimize)
+	
+	def testimporttime(self):
+		if sys.version_info < (3, 7):
+			return
+		p = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', 'import pyhaml.haml'],
+			cwd=os.path.dirname(os.path.abspath(dir)),
+			stderr=subprocess.PIPE)
+		_, err = p.communicate()
+		times = {}
+		for line in err.decode().splitlines()[1:]:
+			_, cumulative, name = line.split('|')
+			times[name.strip()] = int(cumulative)
+		for mod in ('pyhaml.ply.yacc', 'pyhaml.ply.lex', 'pyhaml.parser', 'optparse', 'cgi', 'imp'):
+			self.assertFalse(mod in times, '%s imported eagerly' % mod)
+		self.assertTrue(times['pyhaml.haml'] < 50000)
+	
+	def testcacheeviction(self):
+		en = engine(cache_size=2)
+		for s in ('%a', '%b', '%c', '%a'):
+			en.to_html(s)
+		self.assertEqual(2, en.cache.evictions)
+		self.assertEqual(4, en.cache.misses)
+		self.assertEqual(2, len(en.cache))
+	
 if __name__ == '__main__':
 	unittest.main()
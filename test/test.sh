@@ -1,3 +1,2 @@
-python2.5 $(dirname $0)/test.py
-python2.6 $(dirname $0)/test.py
-python3.1 $(dirname $0)/test.py
+python2.7 $(dirname $0)/test.py
+python3 $(dirname $0)/test.py